@@ -0,0 +1,102 @@
+-- Builds the context neoreader's handlers need in a single evaluation on the
+-- Neovim side, so that every autocmd and command costs one round trip.
+
+local M = {}
+
+-- g: variables backing neoreader's options and their defaults, registered
+-- by the Python host
+local defaults = {}
+
+function M.setup(options)
+  defaults = options
+end
+
+local function option(name)
+  local val = vim.g[name]
+  if val == nil then
+    val = defaults[name]
+  end
+  return val
+end
+
+-- Vimscript booleans are numbers, and 0 is truthy in Lua
+local function enabled(name)
+  local val = option(name)
+  return val ~= nil and val ~= false and val ~= 0
+end
+
+function M.snapshot(wants)
+  wants = wants or {}
+
+  local buf = vim.api.nvim_get_current_buf()
+  local cursor = vim.api.nvim_win_get_cursor(0)
+
+  local snap = {
+    -- When the event fired, in nanoseconds. The host may handle it much
+    -- later if it was busy speaking
+    time = vim.loop.hrtime(),
+    bufnr = buf,
+    changedtick = vim.api.nvim_buf_get_changedtick(buf),
+    cursor = cursor,
+    line = vim.api.nvim_get_current_line(),
+    shiftwidth = vim.bo.shiftwidth,
+    expandtab = vim.bo.expandtab,
+    filetype = vim.bo.filetype,
+    options = {},
+  }
+
+  for name in pairs(defaults) do
+    snap.options[name] = vim.g[name]
+  end
+
+  if wants.selection then
+    local first = vim.api.nvim_buf_get_mark(buf, '<')
+    local last = vim.api.nvim_buf_get_mark(buf, '>')
+    snap.marks = { first, last }
+    snap.lines = first[1] > 0 and vim.api.nvim_buf_get_lines(buf, first[1] - 1, last[1], true) or {}
+  end
+
+  -- Only prefetching reads these, and a search with no match below the
+  -- cursor scans to the end of the buffer
+  if wants.window and enabled('speak_prefetch') then
+    local radius = option('prefetch_radius')
+    local first = math.max(1, cursor[1] - radius)
+    snap.first = first
+    snap.window = vim.api.nvim_buf_get_lines(buf, first - 1, cursor[1] + radius, false)
+
+    local pattern = vim.fn.getreg('/')
+    if pattern ~= '' then
+      local ok, lnum = pcall(vim.fn.search, pattern, 'nW')
+      if ok and lnum > 0 then
+        snap.search = { lnum, vim.fn.getline(lnum) }
+      end
+    end
+  end
+
+  if wants.char then
+    snap.char = vim.v.char
+  end
+
+  if wants.completed_item then
+    snap.completed_item = vim.v.completed_item
+  end
+
+  if wants.event then
+    snap.event = vim.v.event
+  end
+
+  -- Only prefetching for menu narration reads the popup's items, so
+  -- browsing a long popup does not copy all of them on every selection
+  -- otherwise
+  if wants.completion and enabled('speak_completion_menu') and enabled('speak_prefetch') then
+    snap.completion = vim.fn.complete_info({ 'items', 'selected' })
+  end
+
+  if wants.abuf then
+    snap.abuf = tonumber(vim.fn.expand('<abuf>'))
+  end
+
+  return snap
+end
+
+return M
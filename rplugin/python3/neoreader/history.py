@@ -0,0 +1,90 @@
+import atexit
+import itertools
+import os
+import shutil
+import tempfile
+from collections import deque
+from typing import List, Optional
+
+from .sinks import Utterance
+
+
+class Entry(object):
+    def __init__(self, utterances: List[Utterance], audio: Optional[bytes], suffix: str):
+        self.utterances = utterances
+        self.audio = audio
+        self.suffix = suffix
+        self.path = None
+        self.size = sum(len(u.txt) for u in utterances) + (len(audio) if audio else 0)
+
+
+class SpeechHistory(object):
+    """
+    Bounded ring of recent utterances, kept exactly as they were sent to the
+    sinks along with any audio already rendered for them, so that replaying
+    one needs neither option reads, text transforms nor synthesis.
+    """
+
+    def __init__(self, max_entries: int = 50, max_bytes: int = 4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = deque()
+        self.size = 0
+        self.position = -1
+        self.directory = None
+        self.names = itertools.count()
+
+    def record(self, utterances: List[Utterance], audio: Optional[bytes] = None, suffix: str = ""):
+        entry = Entry(utterances, audio, suffix)
+        if entry.size > self.max_bytes:
+            # Too big to keep alongside anything else; the text alone may still fit
+            entry = Entry(utterances, None, "")
+            if entry.size > self.max_bytes:
+                return
+
+        self.entries.append(entry)
+        self.size += entry.size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self.evict()
+
+        self.position = len(self.entries) - 1
+
+    def evict(self):
+        entry = self.entries.popleft()
+        self.size -= entry.size
+        if entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def current(self) -> Optional[Entry]:
+        if not self.entries:
+            return None
+        return self.entries[self.position]
+
+    def step(self, offset: int) -> Optional[Entry]:
+        """
+        Moves through the history, returning None at either end
+        """
+        position = self.position + offset
+        if not 0 <= position < len(self.entries):
+            return None
+
+        self.position = position
+        return self.entries[position]
+
+    def audio_path(self, entry: Entry) -> str:
+        """
+        The entry's audio as a file a player can open, written on first replay
+        """
+        if entry.path is None:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix="neoreader-history-")
+                atexit.register(shutil.rmtree, self.directory, True)
+
+            entry.path = os.path.join(self.directory, f"{next(self.names)}{entry.suffix}")
+            with open(entry.path, "wb") as f:
+                f.write(entry.audio)
+
+        return entry.path
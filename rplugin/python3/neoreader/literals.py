@@ -0,0 +1,130 @@
+import functools
+import re
+from typing import Iterator, Optional, Tuple
+
+
+MAX_LENGTH = 80
+MAX_ITEMS = 20
+
+# Characters of a long literal read out before it is cut short
+HEAD_LENGTH = 5
+
+NUMBER = r"[-+]?\d[\w.]*"
+
+# What a blob runs between; brackets and commas end one, so calls and
+# subscripts in dense code never read as a single blob
+DELIMITERS = r"\s\"'<>(){}\[\],"
+
+URL = rf"[A-Za-z][A-Za-z0-9+.-]*://[^{DELIMITERS}]*"
+BASE64 = r"[A-Za-z0-9_+/-]+={0,2}"
+
+QUOTES = "\"'"
+
+# Groups that match at the end of the line when a string is left open
+UNTERMINATED = {"\"": "open_double", "'": "open_single"}
+
+
+def quoted(quote: str) -> str:
+    q = re.escape(quote)
+    return rf"(?<!\\){q}[^{q}\\]*(?:\\.[^{q}\\]*)*(?:{q}|(?P<{UNTERMINATED[quote]}>$))"
+
+
+@functools.lru_cache(maxsize=16)
+def literal_pattern(max_length: int, quotes: str = QUOTES):
+    """
+    Matches strings in the given quotes, long URLs and base64 runs, and
+    comma-separated runs of numbers.
+
+    Every alternative starts only where the previous token ended or at a
+    run boundary, and an unterminated string runs to the end of the line
+    rather than being retried, so one pass over a line is linear.
+    """
+    strings = "|".join(quoted(quote) for quote in quotes)
+    return re.compile(
+        (rf"(?P<string>{strings})|" if strings else "")
+        + rf"(?P<numbers>(?<![\w.]){NUMBER}(?:\s*,\s*{NUMBER})+)"
+        rf"|(?P<blob>(?<![^{DELIMITERS}])(?=[^{DELIMITERS}]{{{max_length},}})"
+        rf"(?:{URL}|{BASE64})(?![^{DELIMITERS}]))"
+    )
+
+
+def describe_string(length: int, head: str) -> str:
+    return f"string of {length} characters starting with '{head}'"
+
+
+def describe_blob(length: int, head: str) -> str:
+    return f"{length} characters starting with '{head}'"
+
+
+def describe_items(count: int, noun: str) -> str:
+    return f"{count} {noun}"
+
+
+def iter_literals(line: str, max_length=MAX_LENGTH) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yields the (kind, start, end) of each literal in a line.
+
+    A quote left open, like the apostrophe in a comment's "don't", is not a
+    string running to the end of the line. It is skipped, and the scan goes
+    on just past it. No later quote of its kind can close either, so the rest
+    of the line is scanned without that kind of string, and each line is
+    rescanned at most once per kind of quote.
+    """
+    quotes = QUOTES
+    pos = 0
+    while True:
+        for match in literal_pattern(max_length, quotes).finditer(line, pos):
+            start, end = match.span()
+            kind = match.lastgroup
+            if kind == "string" and match.group(UNTERMINATED[line[start]]) is not None:
+                quotes = quotes.replace(line[start], "")
+                pos = start + 1
+                break
+
+            yield kind, start, end
+        else:
+            return
+
+
+def summarize_literals(line: str, max_length=MAX_LENGTH, max_items=MAX_ITEMS) -> str:
+    """
+    Given a line, replace long strings, blobs and runs of numbers with short descriptions
+    """
+    pieces = []
+    kept = 0
+
+    for kind, start, end in iter_literals(line, max_length):
+        if kind == "string":
+            if end - start - 2 <= max_length:
+                continue
+            summary = describe_string(end - start - 2, line[start + 1:start + 1 + HEAD_LENGTH])
+        elif kind == "numbers":
+            count = line.count(",", start, end) + 1
+            if count <= max_items:
+                continue
+            summary = describe_items(count, "numbers")
+        else:
+            summary = describe_blob(end - start, line[start:start + HEAD_LENGTH])
+
+        pieces.append(line[kept:start])
+        pieces.append(summary)
+        kept = end
+
+    if not pieces:
+        return line
+
+    pieces.append(line[kept:])
+    return "".join(pieces)
+
+
+def literal_at(line: str, col: int, max_length=MAX_LENGTH) -> Optional[Tuple[int, int]]:
+    """
+    Span of the string, blob or run of numbers under a 0-based column, if any
+    """
+    for _, start, end in iter_literals(line, max_length):
+        if start > col:
+            return None
+        if col < end:
+            return start, end
+
+    return None
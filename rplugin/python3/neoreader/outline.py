@@ -0,0 +1,117 @@
+from ast import (
+    parse, walk, iter_child_nodes,
+    ClassDef, FunctionDef, AsyncFunctionDef, For, AsyncFor, While, If
+)
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional
+
+
+SCOPE_KINDS =\
+    { ClassDef: "class"
+    , FunctionDef: "function"
+    , AsyncFunctionDef: "async function"
+    , For: "for loop"
+    , AsyncFor: "async for loop"
+    , While: "while loop"
+    , If: "if block"
+    }
+
+
+class Scope(NamedTuple):
+    kind: str
+    name: str
+    start: int
+    end: int
+    parent: int  # Index of the enclosing scope, or -1 at module level
+
+    def describe(self) -> str:
+        return f"{self.kind} {self.name}" if self.name else self.kind
+
+
+def end_line(node) -> int:
+    """
+    Last line spanned by a node, for interpreters without `end_lineno`
+    """
+    end = getattr(node, 'end_lineno', None)
+    if end is not None:
+        return end
+    return max(getattr(n, 'lineno', node.lineno) for n in walk(node))
+
+
+def describe_chain(chain: List[Scope]) -> str:
+    """
+    Reads a scope chain innermost first, e.g. "method add in class Foo"
+    """
+    if not chain:
+        return "module level"
+    return " in ".join(scope.describe() for scope in reversed(chain))
+
+
+class ScopeIndex(object):
+    """
+    Interval index over the definitions and blocks of a module.
+
+    Scopes nest, so they are kept sorted by first line with a pointer to
+    their parent. The enclosing chain of a line is found by bisecting for
+    the last scope starting at or before it and walking up the parents.
+    """
+
+    def __init__(self, scopes: List[Scope], lines: List[str]):
+        self.scopes = scopes
+        self.starts = [scope.start for scope in scopes]
+        self.lines = lines
+
+    @classmethod
+    def from_lines(cls, lines: List[str]) -> 'ScopeIndex':
+        found = []
+
+        def collect(node, parent_kind, depth):
+            for child in iter_child_nodes(node):
+                kind = SCOPE_KINDS.get(type(child))
+                if kind is None:
+                    collect(child, parent_kind, depth)
+                    continue
+
+                if parent_kind == "class" and kind.endswith("function"):
+                    kind = kind.replace("function", "method")
+
+                name = getattr(child, 'name', "")
+                found.append((child.lineno, -end_line(child), depth, kind, name))
+                collect(child, kind, depth + 1)
+
+        collect(parse("\n".join(lines)), None, 0)
+        found.sort()
+
+        scopes = []
+        stack = []
+        for start, neg_end, _, kind, name in found:
+            while stack and scopes[stack[-1]].end < start:
+                stack.pop()
+            parent = stack[-1] if stack else -1
+            stack.append(len(scopes))
+            scopes.append(Scope(kind, name, start, -neg_end, parent))
+
+        return cls(scopes, lines)
+
+    def chain(self, line: int) -> List[Scope]:
+        """
+        Given a 1-based line number, return its enclosing scopes, outermost first
+        """
+        i = bisect_right(self.starts, line) - 1
+        while i >= 0 and self.scopes[i].end < line:
+            i = self.scopes[i].parent
+
+        chain = []
+        while i >= 0:
+            chain.append(self.scopes[i])
+            i = self.scopes[i].parent
+
+        chain.reverse()
+        return chain
+
+    def next_start(self, line: int) -> Optional[int]:
+        """
+        First line of the next scope opening after the given line, if any
+        """
+        i = bisect_right(self.starts, line)
+        return self.starts[i] if i < len(self.starts) else None
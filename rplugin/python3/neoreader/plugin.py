@@ -1,12 +1,23 @@
 import neovim
-import subprocess
 from typing import List
+import contextlib
 import enum
 import functools
 import ast
 import logging
+import re
+import threading
 
 from .py_ast import PrettyReader
+from .outline import ScopeIndex, describe_chain
+from .literals import summarize_literals, literal_at
+from .prefetch import Prefetcher
+from .history import SpeechHistory
+from .tokens import token_pattern, TokenCache
+from .sinks import (
+    Utterance, SubprocessSink, ESpeakSink, SaySink,
+    RecordingSink, FifoSink, EchoSink, Fanout
+)
 
 # Logging config
 logger = logging.getLogger('neoreader')
@@ -45,6 +56,8 @@ BRACKET_PAIRINGS =\
     , ">": ", close angle."
     }
 
+TRUE_BRACKETS = "()[]{}"
+
 GENERIC_BIN_OPS =\
     { "->": "stab"
     , ">=>": "fish"
@@ -81,6 +94,82 @@ HASKELL_BIN_OPS =\
     , ".": "compose"
     }
 
+# Vim's single-letter completion kinds, see :help complete-items
+COMPLETION_KINDS =\
+    { "v": "variable"
+    , "f": "function"
+    , "m": "member"
+    , "t": "type"
+    , "d": "macro"
+    }
+
+DIAGNOSTIC_SEVERITIES =\
+    { 1: ("error", "errors")
+    , 2: ("warning", "warnings")
+    , 3: ("info", "infos")
+    , 4: ("hint", "hints")
+    }
+
+# Returns every diagnostic of a buffer as [lnum, severity, message] triples,
+# so one call covers all the lines the user may land on
+FETCH_DIAGNOSTICS_LUA = """
+local out = {}
+for _, d in ipairs(vim.diagnostic.get(...)) do
+    table.insert(out, { d.lnum, d.severity, d.message })
+end
+return out
+"""
+
+# Prefetcher owner of the completion popup's audio, next to buffer numbers
+COMPLETION_PREFETCH = "completion"
+
+def snapshot(*wants) -> str:
+    """
+    An eval= expression that builds an event's whole context on the Neovim
+    side (see lua/neoreader/init.lua), so that handlers make no further
+    round trips to find the buffer, cursor, line or options
+    """
+    fields = ", ".join(f"'{want}': v:true" for want in wants)
+    return f"luaeval('require(\"neoreader\").snapshot(_A)', {{{fields}}})"
+
+# Horizontal motion reads the token under the cursor, so the operators
+# speak() knows how to name are kept whole
+TOKEN = token_pattern(
+    [*COMPARISONS, *STANDARD, *BRACKET_PAIRINGS, *GENERIC_BIN_OPS, *HASKELL_BIN_OPS]
+)
+
+# Words and numbers, which is all a skim reads of a line
+SKIM_TOKEN = re.compile(r"[A-Za-z_]\w*|\d+")
+
+def summarize_diagnostics(entries) -> str:
+    """
+    Given (severity, message) pairs, return e.g. "2 errors: undefined name foo, ..."
+    """
+    parts = []
+    for severity, (singular, plural) in DIAGNOSTIC_SEVERITIES.items():
+        messages = [message for (sev, message) in entries if sev == severity]
+        if messages:
+            noun = singular if len(messages) == 1 else plural
+            parts.append(f"{len(messages)} {noun}: " + ", ".join(messages))
+    return ". ".join(parts)
+
+def char_column(line: str, byte_col: int) -> int:
+    """
+    Given a line and a 0-based byte column, as Neovim reports the cursor, return the character column
+    """
+    return len(line.encode()[:byte_col].decode(errors='ignore'))
+
+def with_snapshot(fn):
+    """
+    Serves the handler's option reads from the snapshot it was called with
+    """
+    @functools.wraps(fn)
+    def inner(self, *args):
+        with self.cached_options(args[-1]):
+            return fn(self, *args)
+
+    return inner
+
 def requires_option(option):
     def decorator(fn):
         @functools.wraps(fn)
@@ -110,18 +199,104 @@ class Main(object):
         SPEED = ('speak_speed', 350)
         USE_ESPEAK = ('use_espeak', False)
         SPEAK_VOICE = ('speak_voice', '')
+        SPEAK_SCOPE_CHANGES = ('speak_scope_changes', False)
+        SPEAK_DIAGNOSTICS = ('speak_diagnostics', False)
+        SPEAK_PREFETCH = ('speak_prefetch', False)
+        PREFETCH_RADIUS = ('prefetch_radius', 2)
+        PREFETCH_CACHE_SIZE = ('prefetch_cache_size', 16)
+        AUDIO_PLAYER = ('audio_player', '')
+        SPEAK_SINKS = ('speak_sinks', ['audio'])
+        SPEAK_FIFO = ('speak_fifo', '/tmp/neoreader.fifo')
+        SKIM_MODE = ('skim_mode', True)
+        SKIM_THRESHOLD_MS = ('skim_threshold_ms', 150)
+        SKIM_AFTER_MOVES = ('skim_after_moves', 2)
+        SKIM_TOKENS = ('skim_tokens', 2)
+        SKIM_SPEED = ('skim_speed', 600)
+        SKIM_REST_MS = ('skim_rest_ms', 300)
+        LITERAL_MAX_LENGTH = ('literal_max_length', 80)
+        LITERAL_MAX_ITEMS = ('literal_max_items', 20)
+        HISTORY_SIZE = ('history_size', 50)
+        HISTORY_MAX_BYTES = ('history_max_bytes', 4 * 1024 * 1024)
+        SPEAK_TOKENS = ('speak_tokens', True)
+        TOKEN_DEBOUNCE_MS = ('token_debounce_ms', 60)
+        OUTLINE_DEBOUNCE_MS = ('outline_debounce_ms', 200)
+        SPEAK_COMPLETION_MENU = ('speak_completion_menu', False)
+        COMPLETION_DEBOUNCE_MS = ('completion_debounce_ms', 80)
 
     def __init__(self, vim):
         self.vim = vim
+        self.option_memo = None
+        self.vim.exec_lua(
+            'require("neoreader").setup(...)',
+            dict(option.value for option in self.Options)
+        )
         self.last_spoken = ""
         self.enabled = self.get_option(self.Options.ENABLE_AT_STARTUP)
         self.literal_stack = []
+        self.outlines = {}  # bufnr -> (changedtick, ScopeIndex)
+        self.outline_timer = None
+        self.last_scope = []
+        self.diagnostics = {}  # bufnr -> {lnum -> [(severity, message)]}
+        self.prefetcher = Prefetcher(self.get_option(self.Options.PREFETCH_CACHE_SIZE))
+        self.recording = RecordingSink()
+        self.history = SpeechHistory(
+            self.get_option(self.Options.HISTORY_SIZE),
+            self.get_option(self.Options.HISTORY_MAX_BYTES)
+        )
+        self.output = Fanout([])
+        self.output_config = None
+        self.last_move = float('-inf')  # ms, Neovim's clock
+        self.rapid_moves = 0
+        self.rest_timer = None
+        self.last_row = None
+        self.last_line = None
+        self.tokens = TokenCache(TOKEN)
+        self.token_timer = None
+        self.completion_timer = None
+        self.completion_popup = 0
+        self.completion_utterances = {}  # (word, kind, menu) -> Utterance
+
+    @contextlib.contextmanager
+    def cached_options(self, snapshot=None):
+        """
+        Memoizes option reads for the duration of the block. Given an event
+        snapshot, the memo is filled from it up front.
+        """
+        self.option_memo = {}
+        if snapshot is not None:
+            values = snapshot.get('options') or {}
+            for option in self.Options:
+                name, default = option.value
+                val = values.get(name)
+                self.option_memo[option] = default if val is None else val
+            self.option_memo['expandtab'] = snapshot['expandtab']
+            self.option_memo['shiftwidth'] = snapshot['shiftwidth']
+
+        try:
+            yield
+        finally:
+            self.option_memo = None
 
     def get_option(self, option):
+        if self.option_memo is not None and option in self.option_memo:
+            return self.option_memo[option]
+
         name, default = option.value
         val = self.vim.vars.get(name)
         if val is None:
-            return default
+            val = default
+
+        if self.option_memo is not None:
+            self.option_memo[option] = val
+        return val
+
+    def get_vim_option(self, name: str):
+        if self.option_memo is not None and name in self.option_memo:
+            return self.option_memo[name]
+
+        val = self.vim.api.get_option(name)
+        if self.option_memo is not None:
+            self.option_memo[name] = val
         return val
 
     def get_indent_level(self, line: str) -> int:
@@ -129,24 +304,23 @@ class Main(object):
         Given a line, return the indentation level
         """
         whitespaces = 1
-        if self.vim.api.get_option("expandtab"):
-            whitespaces = self.vim.api.get_option("shiftwidth")
+        if self.get_vim_option("expandtab"):
+            whitespaces = self.get_vim_option("shiftwidth")
 
         leading_spaces = len(line) - len(line.lstrip())
 
         return leading_spaces // whitespaces
         
-    def get_current_selection(self) -> List[str]:
+    def get_current_selection(self, snapshot) -> List[str]:
         """
-        Returns the current highlighted selection
+        Returns the highlighted selection captured in the snapshot
         """
-        buf = self.vim.current.buffer
-        line_start, col_start = buf.mark('<')
-        line_end, col_end = buf.mark('>')
-
-        lines = self.vim.api.buf_get_lines(buf, line_start - 1, line_end, True)
+        (_, col_start), (_, col_end) = snapshot['marks']
+        lines = list(snapshot['lines'])
 
-        if len(lines) == 1:
+        if not lines:
+            return lines
+        elif len(lines) == 1:
             lines[0] = lines[0][col_start:col_end]
         else:
             lines[0] = lines[0][col_start:]
@@ -154,37 +328,147 @@ class Main(object):
 
         return lines
 
-    def call_say(self, txt: str, speed=None, pitch=None, literal=False):
-        voice = self.get_option(self.Options.SPEAK_VOICE)
-
-        if self.get_option(self.Options.USE_ESPEAK):
-            args = ["espeak"]
-            if voice:
-                args += ["-v", voice]
-            if pitch:
-                args += ["-p", str(pitch)]
-            if speed:
-                args += ["-s", str(speed)]
-            if literal:
-                txt = " ".join(txt)
-            args.append(txt)
+    def update_outline(self, bufnr: int, changedtick: int):
+        """
+        Reparses the buffer into a ScopeIndex, unless it is already current
+        """
+        tick, index = self.outlines.get(bufnr, (None, None))
+        if tick == changedtick:
+            return index
+
+        lines = self.vim.api.buf_get_lines(bufnr, 0, -1, True)
+        try:
+            index = ScopeIndex.from_lines(lines)
+        except SyntaxError:
+            # Mid-edit; keep the last good index until the buffer parses again
+            pass
+
+        self.outlines[bufnr] = (changedtick, index)
+        return index
+
+    def refresh_outline(self, snapshot) -> bool:
+        """
+        Brings the buffer's ScopeIndex up to date if it is a Python buffer,
+        so only the features that read it pay for parsing
+        """
+        if snapshot['filetype'] != "python":
+            return False
+
+        self.update_outline(snapshot['bufnr'], snapshot['changedtick'])
+        return True
+
+    def get_scope_chain(self, bufnr: int, line: int):
+        _, index = self.outlines.get(bufnr, (None, None))
+        if index is None:
+            return []
+        return index.chain(line)
+
+    def get_line_diagnostics(self, bufnr: int, line: int):
+        """
+        Diagnostics for a 1-based line, fetched for the whole buffer on first use
+        """
+        by_line = self.diagnostics.get(bufnr)
+        if by_line is None:
+            by_line = {}
+            for lnum, severity, message in self.vim.exec_lua(FETCH_DIAGNOSTICS_LUA, bufnr):
+                first_line = message.strip().split("\n", 1)[0]
+                by_line.setdefault(lnum + 1, []).append((severity, first_line))
+            self.diagnostics[bufnr] = by_line
+
+        return by_line.get(line, [])
+
+    def make_sink(self, name: str):
+        if name == "audio":
+            use_espeak = self.get_option(self.Options.USE_ESPEAK)
+            prefetch = self.get_option(self.Options.SPEAK_PREFETCH)
+            return (ESpeakSink if use_espeak else SaySink)(
+                voice=self.get_option(self.Options.SPEAK_VOICE),
+                player=self.get_option(self.Options.AUDIO_PLAYER),
+                prefetcher=self.prefetcher if prefetch else None
+            )
+        elif name == "echo":
+            return EchoSink(self.vim)
+        elif name == "fifo":
+            path = self.get_option(self.Options.SPEAK_FIFO)
+            try:
+                return FifoSink(path)
+            except OSError as e:
+                logger.warning(f"Can't create fifo '{path}': {e}")
+                return None
+        elif name == "memory":
+            return self.recording
         else:
-            args = ["say"]
-            if voice:
-                args += ["-v", voice]
-            if pitch:
-                txt = f"[[ pbas +{pitch}]] {txt}"
-            if speed:
-                args += ["-r", str(speed)]
-            if literal:
-                txt = f"[[ char LTRL ]] {txt}"
-            args.append(txt)
+            logger.warning(f"Unknown sink '{name}'")
+            return None
 
-        if self.enabled:
-            logger.debug(f"Saying '{txt}'")
-            subprocess.run(args)
+    def get_output(self) -> Fanout:
+        """
+        The sinks named by `speak_sinks`, rebuilt only when their configuration changes
+        """
+        config = (
+            tuple(self.get_option(self.Options.SPEAK_SINKS)),
+            self.get_option(self.Options.USE_ESPEAK),
+            self.get_option(self.Options.SPEAK_VOICE),
+            self.get_option(self.Options.AUDIO_PLAYER),
+            self.get_option(self.Options.SPEAK_PREFETCH),
+            self.get_option(self.Options.SPEAK_FIFO),
+        )
+        if config != self.output_config:
+            self.output.close()
+            sinks = [self.make_sink(name) for name in config[0]]
+            self.output = Fanout([sink for sink in sinks if sink is not None])
+            self.output_config = config
+
+        return self.output
+
+    def get_audio_sink(self):
+        for sink in self.get_output().sinks:
+            if isinstance(sink, SubprocessSink):
+                return sink
+        return None
+
+    def say(self, utterances: List[Utterance]):
+        if not self.enabled:
+            return
+
+        for utterance in utterances:
+            logger.debug(f"Saying '{utterance.txt}'")
+        self.get_output().write(utterances)
+        self.remember(utterances)
+
+    def remember(self, utterances: List[Utterance]):
+        """
+        Records what was just said, with its audio if it came pre-rendered
+        """
+        audio, suffix = None, ""
+        sink = self.get_audio_sink()
+        if sink is not None and len(utterances) == 1:
+            path = sink.prefetched(utterances[0])
+            if path is not None:
+                try:
+                    with open(path, "rb") as f:
+                        audio, suffix = f.read(), sink.suffix
+                except OSError:
+                    pass
+
+        self.history.record(utterances, audio, suffix)
+
+    def replay(self, entry):
+        if not self.enabled:
+            return
+
+        output = self.get_output()
+        sink = self.get_audio_sink()
+        if entry.audio is not None and sink is not None and sink is output.sinks[0] and sink.suffix == entry.suffix:
+            output.write_secondary(entry.utterances)
+            sink.play(self.history.audio_path(entry))
+        else:
+            output.write(entry.utterances)
+
+    def speak(self, txt: str, **kwargs):
+        self.say([self.render(txt, **kwargs)])
 
-    def speak(self, 
+    def render(self,
         txt: str,
         brackets=None,
         generic=None,
@@ -194,7 +478,8 @@ class Main(object):
         indent_status=None,
         newline=False,
         literal=False,
-        stop=True
+        stop=True,
+        summarize=True
         ):
 
         if brackets is None:
@@ -216,8 +501,15 @@ class Main(object):
         pitch_mod = indent_level * self.get_option(self.Options.PITCH_MULTIPLIER)
 
         if literal:
-            self.call_say(txt, speed=speed, literal=literal)
+            return Utterance(txt, speed, None, literal)
         else:
+            if summarize:
+                txt = summarize_literals(
+                    txt,
+                    max_length=self.get_option(self.Options.LITERAL_MAX_LENGTH),
+                    max_items=self.get_option(self.Options.LITERAL_MAX_ITEMS)
+                )
+
             if haskell:
                 for (target, replacement) in HASKELL_BIN_OPS.items():
                     txt = txt.replace(target, f" {replacement} ")
@@ -235,45 +527,107 @@ class Main(object):
                     txt = txt.replace(target, f" {replacement} ")
 
             if indent_status:
-                txt = f"indent {index_level}, {txt}"
+                txt = f"indent {indent_level}, {txt}"
             if txt.strip():
                 txt = f"{txt},"
             if newline:
                 txt = f"{txt} newline"
             if stop:
                 txt = f"{txt}, STOP."
-            self.call_say(txt, speed=speed, pitch=pitch_mod)
+            return Utterance(txt, speed, pitch_mod, False)
+
+    def render_skim(self, line: str) -> Utterance:
+        """
+        The leading words of a line, fast and without punctuation, for rapid navigation
+        """
+        indent = line[:len(line) - len(line.lstrip())]
+        tokens = SKIM_TOKEN.findall(line)[:self.get_option(self.Options.SKIM_TOKENS)] or ["blank"]
+
+        return self.render(
+            indent + " ".join(tokens),
+            standard=False,
+            brackets=False,
+            generic=False,
+            haskell=False,
+            indent_status=False,
+            speed=self.get_option(self.Options.SKIM_SPEED),
+            stop=False
+        )
+
+    def schedule_prefetch(self, bufnr: int, changedtick: int, line: int, first: int, window: List[str], search_hit):
+        """
+        Queues the lines the cursor is likely to land on next for pre-rendering:
+        its neighbours nearest first, the next search match and the next definition
+        """
+        nearby = sorted(
+            ((first + i, text) for i, text in enumerate(window) if first + i != line),
+            key=lambda candidate: abs(candidate[0] - line)
+        )
+
+        likely = []
+        search_line, search_text = search_hit
+        if search_line:
+            likely.append((search_line, search_text))
+
+        _, index = self.outlines.get(bufnr, (None, None))
+        if index is not None:
+            definition = index.next_start(line)
+            if definition is not None and definition <= len(index.lines):
+                likely.append((definition, index.lines[definition - 1]))
+
+        candidates = dict(nearby[:2] + likely + nearby[2:])
+
+        sink = self.get_audio_sink()
+        if sink is None:
+            return
+
+        jobs = []
+        for text in candidates.values():
+            utterance = self.render(text, newline=True)
+            path = self.prefetcher.path_for(sink.suffix)
+            jobs.append((
+                tuple(sink.args(utterance)),
+                path,
+                sink.args(utterance, outfile=path)
+            ))
+
+        self.prefetcher.schedule((bufnr, changedtick), jobs)
 
     def explain(self, code: str, line=True) -> str:
         try:
             top_node = ast.parse(code)
 
-            explained = PrettyReader().visit(top_node)
+            explained = PrettyReader(
+                max_length=self.get_option(self.Options.LITERAL_MAX_LENGTH),
+                max_items=self.get_option(self.Options.LITERAL_MAX_ITEMS)
+            ).visit(top_node)
         except SyntaxError as e:
             explained = f"Syntax Error: '{e.msg}'"
             if line:
-                explained += " on line {e.lineno},"
-            explained += " column {e.offset}"
+                explained += f" on line {e.lineno},"
+            explained += f" column {e.offset}"
 
         return explained
 
-    @neovim.function('Speak')
-    def fn_speak(self, text):
-        self.speak(text)
+    @neovim.function('Speak', eval=snapshot())
+    @with_snapshot
+    def fn_speak(self, args, snapshot):
+        self.speak(args[0])
 
-    @neovim.command('SpeakLine')
-    def cmd_speak_line(self):
-        current = self.vim.current.line
-        self.speak(current, newline=True)
+    @neovim.command('SpeakLine', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_line(self, snapshot):
+        self.speak(snapshot['line'], newline=True)
 
-    @neovim.command('SpeakLineDetail')
-    def cmd_speak_line_detail(self):
-        current = self.vim.current.line
-        self.speak(current, brackets=True, generic=False, haskell=False, speed=self.get_option(self.Options.SPEED) - 100)
+    @neovim.command('SpeakLineDetail', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_line_detail(self, snapshot):
+        self.speak(snapshot['line'], brackets=True, generic=False, haskell=False, speed=self.get_option(self.Options.SPEED) - 100)
 
-    @neovim.command('SpeakLineExplain')
-    def cmd_speak_line_explain(self):
-        current = self.vim.current.line.strip()
+    @neovim.command('SpeakLineExplain', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_line_explain(self, snapshot):
+        current = snapshot['line'].strip()
 
         explained = self.explain(current, line=False)
      
@@ -287,19 +641,73 @@ class Main(object):
             speed=200
         )
 
-    @neovim.command('SpeakRange', range=True)
-    def cmd_speak_range(self, line_range):
-        for i in self.get_current_selection():
-            self.speak(i)
+    @neovim.command('SpeakLiteral', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_literal(self, snapshot):
+        span = literal_at(
+            snapshot['line'],
+            char_column(snapshot['line'], snapshot['cursor'][1]),
+            max_length=self.get_option(self.Options.LITERAL_MAX_LENGTH)
+        )
+        if span is None:
+            self.speak("no literal under cursor", standard=False)
+            return
 
-    @neovim.command('SpeakRangeDetail', range=True)
-    def cmd_speak_range_detail(self, line_range):
-        for i in self.get_current_selection():
-            self.speak(i, brackets=True, generic=False, haskell=False, speed=self.get_option(self.Options.SPEED) - 100)
+        start, end = span
+        self.speak(snapshot['line'][start:end], summarize=False)
+
+    @neovim.command('SpeakRepeat', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_repeat(self, snapshot):
+        entry = self.history.current()
+        if entry is None:
+            self.say_unrecorded("nothing spoken yet")
+        else:
+            self.replay(entry)
+
+    @neovim.command('SpeakPrevious', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_previous(self, snapshot):
+        entry = self.history.step(-1)
+        if entry is None:
+            self.say_unrecorded("start of history")
+        else:
+            self.replay(entry)
+
+    @neovim.command('SpeakNext', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_next(self, snapshot):
+        entry = self.history.step(1)
+        if entry is None:
+            self.say_unrecorded("end of history")
+        else:
+            self.replay(entry)
+
+    def say_unrecorded(self, txt: str):
+        if self.enabled:
+            self.get_output().write([self.render(txt, standard=False)])
+
+    @neovim.command('SpeakRange', range=True, eval=snapshot('selection'))
+    @with_snapshot
+    def cmd_speak_range(self, line_range, snapshot):
+        self.say([self.render(i) for i in self.get_current_selection(snapshot)])
+
+    @neovim.command('SpeakRangeDetail', range=True, eval=snapshot('selection'))
+    @with_snapshot
+    def cmd_speak_range_detail(self, line_range, snapshot):
+        speed = self.get_option(self.Options.SPEED) - 100
+        self.say([
+            self.render(i, brackets=True, generic=False, haskell=False, speed=speed)
+            for i in self.get_current_selection(snapshot)
+        ])
+
+    @neovim.command('SpeakRangeExplain', range=True, eval=snapshot('selection'))
+    @with_snapshot
+    def cmd_explain_range(self, line_range, snapshot):
+        lines = self.get_current_selection(snapshot)
+        if not lines:
+            return
 
-    @neovim.command('SpeakRangeExplain', range=True)
-    def cmd_explain_range(self, line_range):
-        lines = self.get_current_selection()
         new_first_line = lines[0].lstrip()
         base_indent_level = len(lines[0]) - len(new_first_line)
 
@@ -322,25 +730,309 @@ class Main(object):
             speed=200
         )
 
-    @neovim.autocmd('CursorMoved')
-    @requires_option(Options.AUTO_SPEAK_LINE)
-    def handle_cursor_moved(self):
-        current = self.vim.current.line
+    @neovim.command('SpeakScope', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_scope(self, snapshot):
+        if not self.refresh_outline(snapshot):
+            self.speak(f"no outline for {snapshot['filetype'] or 'this buffer'}", stop=True)
+            return
+
+        chain = self.get_scope_chain(snapshot['bufnr'], snapshot['cursor'][0])
+
+        self.speak(describe_chain(chain), standard=False, stop=True)
+
+    @neovim.autocmd('BufEnter,TextChanged,InsertLeave', eval=snapshot())
+    @with_snapshot
+    def handle_text_changed(self, snapshot):
+        """
+        Rebuilds the outline once editing pauses, off the cursor path, and
+        only for Python buffers with a feature that reads it between commands
+        """
+        if snapshot['filetype'] != "python":
+            return
+        if not (self.get_option(self.Options.SPEAK_SCOPE_CHANGES)
+                or self.get_option(self.Options.SPEAK_PREFETCH)):
+            return
+
+        if self.outline_timer is not None:
+            self.outline_timer.cancel()
+
+        def settle():
+            if self.outline_timer is timer:
+                self.outline_timer = None
+                self.refresh_outline(snapshot)
+
+        delay = self.get_option(self.Options.OUTLINE_DEBOUNCE_MS) / 1000
+        timer = threading.Timer(delay, self.vim.async_call, [settle])
+        timer.daemon = True
+        self.outline_timer = timer
+        timer.start()
+
+    @neovim.autocmd('BufDelete', eval=snapshot('abuf'))
+    def handle_buf_delete(self, snapshot):
+        self.outlines.pop(snapshot['abuf'], None)
+        self.diagnostics.pop(snapshot['abuf'], None)
+
+    @neovim.command('SpeakDiagnostics', eval=snapshot())
+    @with_snapshot
+    def cmd_speak_diagnostics(self, snapshot):
+        entries = self.get_line_diagnostics(snapshot['bufnr'], snapshot['cursor'][0])
+        summary = summarize_diagnostics(entries) if entries else "no diagnostics"
+
+        self.speak(summary, standard=False, stop=True)
+
+    @neovim.autocmd('DiagnosticChanged', eval=snapshot('abuf'))
+    def handle_diagnostic_changed(self, snapshot):
+        self.diagnostics.pop(snapshot['abuf'], None)
+
+    @neovim.autocmd('CursorHold', eval=snapshot())
+    @with_snapshot
+    @requires_option(Options.SPEAK_DIAGNOSTICS)
+    def handle_cursor_hold(self, snapshot):
+        entries = self.get_line_diagnostics(snapshot['bufnr'], snapshot['cursor'][0])
+        if entries:
+            self.speak(summarize_diagnostics(entries), standard=False, stop=True)
+
+    def announce_scope_change(self, snapshot):
+        """
+        Reads only the stored outline; rebuilding it is left to handle_text_changed
+        """
+        if snapshot['filetype'] != "python":
+            # Forget the last scope, so coming back to Python announces it
+            self.last_scope = None
+            return
+
+        if self.outlines.get(snapshot['bufnr'], (None, None))[1] is None:
+            # Not parsed yet; stay quiet rather than guess "module level"
+            return
+
+        chain = self.get_scope_chain(snapshot['bufnr'], snapshot['cursor'][0])
+        if chain == self.last_scope:
+            return
+
+        self.last_scope = chain
+        self.speak(f"in {describe_chain(chain)}", standard=False, stop=False)
+
+    def is_skimming(self, snapshot) -> bool:
+        """
+        Times this cursor move against the last one; enough quick moves in a row means skimming.
+        Moves are timed by when Neovim saw them, as the host handles a burst
+        of them one utterance apart.
+        """
+        now = snapshot['time'] / 1e6
+        rapid = now - self.last_move < self.get_option(self.Options.SKIM_THRESHOLD_MS)
+        self.last_move = now
+        self.rapid_moves = self.rapid_moves + 1 if rapid else 0
+
+        self.cancel_rest()
+
+        return self.get_option(self.Options.SKIM_MODE)\
+            and self.rapid_moves >= self.get_option(self.Options.SKIM_AFTER_MOVES)
+
+    def cancel_rest(self):
+        if self.rest_timer is not None:
+            self.rest_timer.cancel()
+            self.rest_timer = None
+
+    def schedule_rest(self, snapshot):
+        """
+        Reads the line in full once the cursor has rested on it
+        """
+        moved_at = self.last_move
+        delay = self.get_option(self.Options.SKIM_REST_MS) / 1000
+
+        def rest():
+            # A move may have slipped in between the timer firing and this running
+            if self.last_move == moved_at:
+                self.rapid_moves = 0
+                with self.cached_options(snapshot):
+                    self.speak(snapshot['line'], newline=True)
+
+        self.rest_timer = threading.Timer(delay, self.vim.async_call, [rest])
+        self.rest_timer.daemon = True
+        self.rest_timer.start()
+
+    def speak_token(self, snapshot):
+        """
+        Reads the token under the cursor, from the line's cached token index
+        """
+        current = snapshot['line']
+        row, byte_col = snapshot['cursor']
+        col = char_column(current, byte_col)
+
+        tokens = self.tokens.get((snapshot['bufnr'], row, snapshot['changedtick']), current)
+        token = tokens.at(col)
+
+        if token is None:
+            self.speak("space", standard=False, stop=False)
+        else:
+            # Padded as COMPARISONS expects, so "<" is "less than" rather
+            # than an angle bracket; a lone true bracket is meaningless unless named
+            brackets = True if token in TRUE_BRACKETS else None
+            utterance = self.render(f" {token} ", brackets=brackets, stop=False, summarize=False)
+            # The padding is not indentation
+            self.say([utterance._replace(pitch=0)])
+
+    def cancel_token(self):
+        if self.token_timer is not None:
+            self.token_timer.cancel()
+            self.token_timer = None
+
+    def schedule_token(self, snapshot):
+        """
+        Reads the token once horizontal motion pauses, so a burst of `l` or `w` says only where it ends
+        """
+        self.cancel_token()
+
+        delay = self.get_option(self.Options.TOKEN_DEBOUNCE_MS) / 1000
+        if delay <= 0:
+            self.speak_token(snapshot)
+            return
+
+        def settle():
+            # A later move may have replaced this timer after it fired
+            if self.token_timer is timer:
+                self.token_timer = None
+                with self.cached_options(snapshot):
+                    self.speak_token(snapshot)
+
+        timer = threading.Timer(delay, self.vim.async_call, [settle])
+        timer.daemon = True
+        self.token_timer = timer
+        timer.start()
+
+    def describe_completion(self, item) -> Utterance:
+        """
+        The word, kind and menu text of a completion item, rendered once per popup
+        """
+        key = (item.get('word', ''), item.get('kind', ''), item.get('menu', ''))
+        utterance = self.completion_utterances.get(key)
+        if utterance is None:
+            word, kind, menu = key
+            parts = [word, COMPLETION_KINDS.get(kind, kind), menu]
+            utterance = self.render(
+                ", ".join(part for part in parts if part.strip()),
+                standard=False,
+                indent_status=False,
+                stop=False
+            )
+            self.completion_utterances[key] = utterance
+
+        return utterance
+
+    def prefetch_completions(self, info):
+        """
+        Given the popup's complete_info(), pre-renders the items either side of
+        the highlighted one, and the highlighted one itself, so cycling through
+        the popup plays from cache
+        """
+        sink = self.get_audio_sink()
+        if sink is None:
+            return
+
+        items, selected = info['items'], info['selected']
+
+        jobs = []
+        for i in (selected + 1, selected - 1, selected):
+            if 0 <= i < len(items):
+                utterance = self.describe_completion(items[i])
+                path = self.prefetcher.path_for(sink.suffix)
+                jobs.append((
+                    tuple(sink.args(utterance)),
+                    path,
+                    sink.args(utterance, outfile=path)
+                ))
+
+        # Owned by the popup rather than the buffer, so inserting the
+        # highlighted word does not evict its audio, and the next popup does.
+        # This replaces any queued line prefetch; the next CursorMoved
+        # queues its own batch again
+        self.prefetcher.schedule((COMPLETION_PREFETCH, self.completion_popup), jobs)
+
+    def cancel_completion(self):
+        if self.completion_timer is not None:
+            self.completion_timer.cancel()
+            self.completion_timer = None
+
+    def schedule_completion(self, snapshot, item):
+        """
+        Reads the highlighted item once the popup selection settles, so cycling with <C-n> says only where it stops
+        """
+        self.cancel_completion()
+
+        def settle():
+            # A later selection may have replaced this timer after it fired
+            if self.completion_timer is timer:
+                self.completion_timer = None
+                with self.cached_options(snapshot):
+                    self.say([self.describe_completion(item)])
+                    if snapshot.get('completion'):
+                        self.prefetch_completions(snapshot['completion'])
+
+        delay = self.get_option(self.Options.COMPLETION_DEBOUNCE_MS) / 1000
+        timer = threading.Timer(delay, self.vim.async_call, [settle])
+        timer.daemon = True
+        self.completion_timer = timer
+        timer.start()
+
+    @neovim.autocmd('CursorMoved', eval=snapshot('window'))
+    @with_snapshot
+    def handle_cursor_moved(self, snapshot):
+        bufnr, changedtick = snapshot['bufnr'], snapshot['changedtick']
+        line = snapshot['cursor'][0]
+
+        # Same row and same text, whether or not the line was read out
+        row = (bufnr, line)
+        horizontal = row == self.last_row and snapshot['line'] == self.last_line
+        self.last_row = row
+        self.last_line = snapshot['line']
+        if horizontal:
+            # Moving along a skimmed line reads tokens, not the whole line
+            self.cancel_rest()
+            if self.get_option(self.Options.SPEAK_TOKENS):
+                self.schedule_token(snapshot)
+            return
+
+        # A token still waiting to be read belongs to the line just left
+        self.cancel_token()
+
+        skimming = self.is_skimming(snapshot)
+
+        if self.get_option(self.Options.SPEAK_SCOPE_CHANGES):
+            self.announce_scope_change(snapshot)
+
+        if not self.get_option(self.Options.AUTO_SPEAK_LINE):
+            return
+
+        current = snapshot['line']
         if current == self.last_spoken:
             # FIXME: Dirty hack. Should rather figure out whether changing lines
             pass
+        elif skimming:
+            self.last_spoken = current
+            self.say([self.render_skim(current)])
+            self.schedule_rest(snapshot)
+            return
         else:
             self.last_spoken = current
             self.speak(current, newline=True)
 
-    @neovim.autocmd('InsertEnter')
+        if self.get_option(self.Options.SPEAK_PREFETCH):
+            self.schedule_prefetch(
+                bufnr, changedtick, line,
+                snapshot['first'], snapshot['window'], snapshot.get('search') or [0, ""]
+            )
+
+    @neovim.autocmd('InsertEnter', eval=snapshot())
+    @with_snapshot
     @requires_option(Options.SPEAK_MODE_TRANSITIONS)
-    def handle_insert_enter(self):
+    def handle_insert_enter(self, snapshot):
         self.speak("INSERT ON", stop=True)
 
-    @neovim.autocmd('InsertLeave')
+    @neovim.autocmd('InsertLeave', eval=snapshot())
+    @with_snapshot
     @requires_option(Options.SPEAK_MODE_TRANSITIONS)
-    def handle_insert_leave(self): 
+    def handle_insert_leave(self, snapshot): 
         self.speak("INSERT OFF", stop=True)
 
     def flush_stack(self):
@@ -350,12 +1042,13 @@ class Main(object):
             self.speak(word, literal=True, speed=700)
 
 
-    @neovim.autocmd('InsertCharPre', eval='[v:char, getpos(".")]')
-    def handle_insert_char(self, data):
-        inserted, pos = data
-        _, row, col, _ = pos
-        #row, col = self.vim.api.win_get_cursor(self.vim.current.window)
-        line = self.vim.current.line
+    @neovim.autocmd('InsertCharPre', eval=snapshot('char'))
+    @with_snapshot
+    def handle_insert_char(self, snapshot):
+        inserted = snapshot['char']
+        # getpos()-style 1-based column
+        col = snapshot['cursor'][1] + 1
+        line = snapshot['line']
 
         self.literal_stack.append(inserted)
 
@@ -372,9 +1065,30 @@ class Main(object):
         elif len(self.literal_stack) > 3:
             self.flush_stack()
 
-    @neovim.autocmd('CompleteDone', eval='v:completed_item')
-    @requires_option(Options.SPEAK_COMPLETIONS)
-    def handle_complete_done(self, item):
+    @neovim.autocmd('CompleteChanged', eval=snapshot('event', 'completion'))
+    @with_snapshot
+    @requires_option(Options.SPEAK_COMPLETION_MENU)
+    def handle_complete_changed(self, snapshot):
+        item = (snapshot.get('event') or {}).get('completed_item')
+        if not item:
+            # Nothing highlighted, e.g. back at the originally typed text
+            self.cancel_completion()
+            return
+
+        self.schedule_completion(snapshot, item)
+
+    @neovim.autocmd('CompleteDone', eval=snapshot('completed_item'))
+    @with_snapshot
+    def handle_complete_done(self, snapshot):
+        # The popup is gone, and with it what was rendered for its items
+        self.cancel_completion()
+        self.completion_utterances = {}
+        self.completion_popup += 1
+
+        if not self.get_option(self.Options.SPEAK_COMPLETIONS):
+            return
+
+        item = snapshot['completed_item']
         if not item:
             return
 
@@ -0,0 +1,120 @@
+import atexit
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+
+def lower_priority():
+    os.nice(19)
+
+
+class Prefetcher(object):
+    """
+    Renders predicted utterances to audio files on an idle-priority thread.
+
+    Entries are keyed by the synthesizer argv that would have spoken them,
+    so a hit is exactly the audio the foreground would have produced.
+    Scheduling a new batch replaces the queue, whoever queued it, and kills
+    a render that is no longer wanted; nothing starts while foreground
+    speech is playing.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = capacity
+        self.directory = tempfile.mkdtemp(prefix="neoreader-")
+        atexit.register(shutil.rmtree, self.directory, True)
+
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.idle = threading.Event()
+        self.idle.set()
+
+        self.cache = OrderedDict()  # key -> ((owner, version), path)
+        self.pending = []
+        self.wanted = set()
+        self.running = None
+        self.names = itertools.count()
+        self.thread = None
+
+    def path_for(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{next(self.names)}{suffix}")
+
+    def take(self, key: Hashable) -> Optional[str]:
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            self.cache.move_to_end(key)
+            return entry[1]
+
+    def schedule(self, tag: Tuple[Hashable, Hashable], jobs: List[Tuple[Hashable, str, List[str]]]):
+        """
+        Given an (owner, version) tag, such as (bufnr, changedtick), and
+        (key, path, argv) jobs in priority order, replace whatever was queued
+        before. Cached entries of the same owner at another version are stale
+        and evicted.
+        """
+        with self.lock:
+            owner, version = tag
+            for key, (entry_tag, path) in list(self.cache.items()):
+                if entry_tag[0] == owner and entry_tag[1] != version:
+                    self.evict(key)
+
+            self.pending = [(tag, *job) for job in jobs if job[0] not in self.cache]
+            self.wanted = {job[0] for job in jobs}
+
+            if self.running is not None and self.running[0] not in self.wanted:
+                self.running[1].kill()
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.wake.notify()
+
+    def evict(self, key: Hashable):
+        _, path = self.cache.pop(key)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def run(self):
+        while True:
+            with self.wake:
+                while not self.pending:
+                    self.wake.wait()
+                tag, key, path, argv = self.pending.pop(0)
+
+            # Yield to foreground speech, then make sure the job survived the wait
+            self.idle.wait()
+            with self.lock:
+                if key not in self.wanted or key in self.cache:
+                    continue
+                try:
+                    process = subprocess.Popen(
+                        argv,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                        preexec_fn=lower_priority
+                    )
+                except OSError:
+                    continue
+                self.running = (key, process)
+
+            code = process.wait()
+
+            with self.lock:
+                self.running = None
+                if code != 0 or key not in self.wanted:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+
+                self.cache[key] = (tag, path)
+                while len(self.cache) > self.capacity:
+                    self.evict(next(iter(self.cache)))
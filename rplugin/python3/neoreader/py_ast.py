@@ -1,6 +1,12 @@
-from ast import parse, walk, iter_fields, dump, NodeVisitor, get_docstring
+from ast import parse, walk, iter_fields, dump, NodeVisitor, get_docstring, Constant
 import sys
 
+if __package__:
+    from .literals import MAX_LENGTH, MAX_ITEMS, HEAD_LENGTH, describe_string, describe_items
+else:
+    # Run as a script, for the demo at the bottom
+    from literals import MAX_LENGTH, MAX_ITEMS, HEAD_LENGTH, describe_string, describe_items
+
 
 def interpret_async(is_async):
     return "an async" if is_async else "a"
@@ -8,12 +14,38 @@ def interpret_async(is_async):
 
 class PrettyReader(NodeVisitor):
 
+    def __init__(self, max_length=MAX_LENGTH, max_items=MAX_ITEMS):
+        self.max_length = max_length
+        self.max_items = max_items
+
+    def generic_visit(self, node):
+        # Unknown or newer node types get named rather than dropping a None into the summary
+        return f"a {type(node).__name__} node"
+
     def visit_list(self, xs):
         if len(xs) <= 1:
             return ", ".join([self.visit(i) for i in xs ])
         else:
             return ", ".join([self.visit(i) for i in xs[:-1]]) + f" and {self.visit(xs[-1])}"
 
+    def visit_elements(self, kind, elts):
+        """
+        Reads a display's elements, or just counts them if they're a long run of literals
+        """
+        if len(elts) > self.max_items and all(isinstance(e, Constant) for e in elts):
+            types = {type(e.value) for e in elts}
+            noun = "numbers" if types <= {int, float, complex} else\
+                   "strings" if types == {str} else\
+                   "values"
+            return f"a {kind} of {describe_items(len(elts), noun)}"
+
+        return f"a {kind} of {self.visit_list(elts)}"
+
+    def visit_string(self, value):
+        if len(value) > self.max_length:
+            return f"a {describe_string(len(value), value[:HEAD_LENGTH])}"
+        return f"\"{value}\""
+
     def visit_optional_list(self, xs, format_string="{}"):
         if len(xs) == 0:
             return ""
@@ -72,7 +104,7 @@ class PrettyReader(NodeVisitor):
     """
 
     def visit_FunctionDef(self, node, is_async=False):
-        docstring = f"\"{get_docstring(node, True)}\""
+        docstring = get_docstring(node, True)
         body = node.body
         if docstring:
             body = body[1:]  # Don't mention it
@@ -81,13 +113,13 @@ class PrettyReader(NodeVisitor):
             + f"{interpret_async(is_async)} function called \"{node.name}\""\
             + f", taking {self.visit(node.args)}"\
             + (f", and returning a value of {self.visit(node.returns)}" if node.returns else "")\
-            + (f", with the docstring of {docstring}" if docstring else "")\
+            + (f", with the docstring of \"{docstring}\"" if docstring else "")\
             + f", with a body of {self.visit(body)}"
 
         return summary
 
     def visit_AsyncFunctionDef(self, node):
-        return visit_FunctionDef(self, node, is_async=True)
+        return self.visit_FunctionDef(node, is_async=True)
 
     def visit_ClassDef(self, node):
         summary = (
@@ -110,7 +142,7 @@ class PrettyReader(NodeVisitor):
         return f"an L-value {self.visit_list(node.targets)} assigned {self.visit(node.value)}"
 
     def visit_AugAssign(self, node):
-        return f"an L-value {self.visit(node.target)} augmented with {self.visit(node.operator)} and the value {self.visit(node.value)}"
+        return f"an L-value {self.visit(node.target)} augmented with {self.visit(node.op)} and the value {self.visit(node.value)}"
 
     def visit_AnnAssign(self, node):
         return "TODO"
@@ -126,7 +158,7 @@ class PrettyReader(NodeVisitor):
         return summary
 
     def visit_AsyncFor(self, node):
-        return visit_For(self, node, is_async=True)
+        return self.visit_For(node, is_async=True)
 
     def visit_While(self, node):
         summary = (
@@ -149,14 +181,14 @@ class PrettyReader(NodeVisitor):
     def visit_With(self, node, is_async=False):
         summary = (
             f"{interpret_async(is_async)} with block"
-            f", using {self.visit_list(node.withitem)}"
+            f", using {self.visit_list(node.items)}"
             f", with a body of {self.visit_list(node.body)}"
             # TODO: orelse
         )
         return summary
     
     def visit_AsyncWith(self, node):
-        return visit_With(self, node, is_async=True)
+        return self.visit_With(node, is_async=True)
 
     def visit_Raise(self, node):
         summary = ""\
@@ -241,6 +273,9 @@ class PrettyReader(NodeVisitor):
         | Tuple(expr* elts, expr_context ctx)
     """
 
+    def visit_BoolOp(self, node):
+        return f" {self.visit(node.op)} ".join(self.visit(i) for i in node.values)
+
     def visit_BinOp(self, node):
         return f"{self.visit(node.left)} {self.visit(node.op)} {self.visit(node.right)}"
 
@@ -255,14 +290,17 @@ class PrettyReader(NodeVisitor):
 
         return summary
 
-    def visit_IfExpr(self, node):
+    def visit_IfExp(self, node):
         return f"if {self.visit(node.test)} then {self.visit(node.body)} else {self.visit(node.orelse)}"
 
     def visit_Dict(self, node):
-        return f"a dict of keys {self.visit_list(node.keys)}, and values {self.visit_list(node.values)}"
+        # A key of None marks a `**mapping` splat
+        keys = [self.visit(k) if k is not None else "splatted" for k in node.keys]
+        keys = ", ".join(keys[:-1]) + f" and {keys[-1]}" if len(keys) > 1 else "".join(keys)
+        return f"a dict of keys {keys}, and values {self.visit_list(node.values)}"
 
     def visit_Set(self, node):
-        return f"a set of keys {self.visit_list(node.elts)}"
+        return self.visit_elements("set", node.elts)
 
     def visit_ListComp(self, node):
         summary = (
@@ -317,7 +355,7 @@ class PrettyReader(NodeVisitor):
         return str(node.n)
 
     def visit_Str(self, node):
-        return f"\"{node.s}\""
+        return self.visit_string(node.s)
 
     def visit_FormattedValue(self, node):
         return "TODO"
@@ -335,7 +373,18 @@ class PrettyReader(NodeVisitor):
         return "ellipsis"
 
     def visit_Constant(self, node):
-        return self.visit(node.value)
+        # Python 3.8+ parses every literal to a Constant wrapping a plain value
+        value = node.value
+        if value is Ellipsis:
+            return "ellipsis"
+        elif isinstance(value, str):
+            return self.visit_string(value)
+        elif isinstance(value, bytes):
+            if len(value) > self.max_length:
+                return f"the bytes, {describe_items(len(value), 'bytes')} long"
+            return f"the bytes \"{value.decode('utf-8', 'replace')}\""
+        else:
+            return str(value)
     
     def visit_Attribute(self, node):
         return f"{self.visit(node.value)} \"dot\" {node.attr}"
@@ -353,10 +402,10 @@ class PrettyReader(NodeVisitor):
         if len(node.elts) == 0:
             return "an empty list"
         else:
-            return f"a list of {self.visit_list(node.elts)}"
+            return self.visit_elements("list", node.elts)
 
     def visit_Tuple(self, node):
-        return f"a tuple of {self.visit_list(node.elts)}"
+        return self.visit_elements("tuple", node.elts)
 
     """
     slice = Slice(expr? lower, expr? upper, expr? step)
@@ -496,7 +545,7 @@ class PrettyReader(NodeVisitor):
 
         return summary
 
-    def visit_excepthandler(self, node):
+    def visit_ExceptHandler(self, node):
         return "TODO"
 
     def visit_arguments(self, node):
@@ -509,9 +558,6 @@ class PrettyReader(NodeVisitor):
     def visit_arg(self, node):
         return f"\"{node.arg}\"" + (f" of type {self.visit(node.annotation)}" if node.annotation else "")
 
-    def visit_excepthandler(self, node):
-        return "TODO"
-    
     def visit_keyword(self, node):
         return "TODO"
 
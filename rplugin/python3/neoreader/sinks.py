@@ -0,0 +1,292 @@
+import logging
+import os
+import queue
+import shlex
+import subprocess
+import threading
+from collections import namedtuple
+from itertools import groupby
+from typing import Iterator, List, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+logger = logging.getLogger('neoreader')
+
+# A fully transformed line, ready for the synthesizer
+Utterance = namedtuple('Utterance', ['txt', 'speed', 'pitch', 'literal'])
+
+
+class Sink(object):
+    """
+    Destination for finished utterances. Writes come in batches so that a
+    sink can amortize its per-call overhead across them.
+    """
+
+    def write(self, utterances: List[Utterance]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SubprocessSink(Sink):
+    """
+    Speaks through a command-line synthesizer. Consecutive utterances with
+    the same speed, pitch and literal-ness share one process.
+    """
+    suffix = ""
+    default_player = ""
+
+    def __init__(self, voice="", player="", prefetcher=None):
+        self.voice = voice
+        self.player = player or self.default_player
+        self.prefetcher = prefetcher
+
+    def args(self, utterance: Utterance, outfile: Optional[str] = None) -> List[str]:
+        """
+        Builds the synthesizer command, writing to `outfile` instead of the speakers if given
+        """
+        raise NotImplementedError
+
+    def play_args(self, path: str) -> List[str]:
+        return shlex.split(self.player) + [path]
+
+    def runs(self, utterances: List[Utterance]) -> Iterator[Utterance]:
+        run = []
+        for utterance in utterances:
+            if run and utterance[1:] != run[-1][1:]:
+                yield run[0]._replace(txt=" ".join(u.txt for u in run))
+                run = []
+            run.append(utterance)
+
+        if run:
+            yield run[0]._replace(txt=" ".join(u.txt for u in run))
+
+    def commands(self, utterances: List[Utterance]) -> Iterator[List[str]]:
+        for utterance in self.runs(utterances):
+            yield self.args(utterance)
+
+    def run(self, args: List[str]):
+        if self.prefetcher is None:
+            subprocess.run(args)
+            return
+
+        # Hold background renders off while the speakers are busy
+        self.prefetcher.idle.clear()
+        try:
+            subprocess.run(args)
+        finally:
+            self.prefetcher.idle.set()
+
+    def play(self, path: str):
+        self.run(self.play_args(path))
+
+    def prefetched(self, utterance: Utterance) -> Optional[str]:
+        if self.prefetcher is None:
+            return None
+        return self.prefetcher.take(tuple(self.args(utterance)))
+
+    def write(self, utterances: List[Utterance]):
+        for args in self.commands(utterances):
+            path = self.prefetcher.take(tuple(args)) if self.prefetcher else None
+            if path is not None:
+                logger.debug(f"Prefetch hit for '{args[-1]}'")
+                args = self.play_args(path)
+
+            self.run(args)
+
+
+class ESpeakSink(SubprocessSink):
+    suffix = ".wav"
+    default_player = "aplay -q"
+
+    def args(self, utterance: Utterance, outfile: Optional[str] = None) -> List[str]:
+        txt, speed, pitch, literal = utterance
+
+        args = ["espeak"]
+        if self.voice:
+            args += ["-v", self.voice]
+        if pitch:
+            args += ["-p", str(pitch)]
+        if speed:
+            args += ["-s", str(speed)]
+        if outfile:
+            args += ["-w", outfile]
+        if literal:
+            txt = " ".join(txt)
+        args.append(txt)
+
+        return args
+
+    def ssml_args(self, utterances: List[Utterance]) -> List[str]:
+        """
+        Speaks several lines in one process, carrying each line's pitch in a
+        <prosody> element and the line boundary in a <break>
+        """
+        body = []
+        for txt, _, pitch, _ in utterances:
+            if pitch:
+                body.append(f"<prosody pitch={quoteattr(str(pitch))}>{escape(txt)}</prosody><break/>")
+            else:
+                body.append(f"{escape(txt)}<break/>")
+
+        args = ["espeak", "-m"]
+        if self.voice:
+            args += ["-v", self.voice]
+        if utterances[0].speed:
+            args += ["-s", str(utterances[0].speed)]
+        args.append("<speak>" + "\n".join(body) + "</speak>")
+
+        return args
+
+    def commands(self, utterances: List[Utterance]) -> Iterator[List[str]]:
+        # Pitch can change mid-document in SSML, so only speed and
+        # literal-ness need a new process
+        for _, run in groupby(utterances, key=lambda u: (u.speed, u.literal)):
+            run = list(run)
+            if run[0].literal or len({u.pitch for u in run}) == 1:
+                yield from super().commands(run)
+            else:
+                yield self.ssml_args(run)
+
+
+class SaySink(SubprocessSink):
+    suffix = ".aiff"
+    default_player = "afplay"
+
+    def args(self, utterance: Utterance, outfile: Optional[str] = None) -> List[str]:
+        txt, speed, pitch, literal = utterance
+
+        args = ["say"]
+        if self.voice:
+            args += ["-v", self.voice]
+        if pitch:
+            txt = f"[[ pbas +{pitch}]] {txt}"
+        if speed:
+            args += ["-r", str(speed)]
+        if outfile:
+            args += ["-o", outfile]
+        if literal:
+            txt = f"[[ char LTRL ]] {txt}"
+        args.append(txt)
+
+        return args
+
+
+class RecordingSink(Sink):
+    """
+    Keeps every utterance in memory, for tests and benchmarks
+    """
+
+    def __init__(self):
+        self.utterances = []
+
+    def write(self, utterances: List[Utterance]):
+        self.utterances.extend(utterances)
+
+
+class FifoSink(Sink):
+    """
+    Writes one line per utterance to a named pipe, for braille displays and
+    external TTS bridges. Utterances are dropped while nobody is reading,
+    rather than stalling the editor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = None
+        if not os.path.exists(path):
+            os.mkfifo(path)
+
+    def write(self, utterances: List[Utterance]):
+        if self.fd is None:
+            try:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                # ENXIO: no reader has opened the pipe yet
+                return
+
+        data = "".join(u.txt.replace("\n", " ") + "\n" for u in utterances)
+        try:
+            os.write(self.fd, data.encode())
+        except BlockingIOError:
+            # The reader has fallen behind; drop this batch
+            pass
+        except OSError:
+            # The reader went away; reopen on the next write
+            self.close()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class EchoSink(Sink):
+    """
+    Shows utterances in the echo area. Everything written before the editor
+    gets round to drawing is shown by a single echo.
+    """
+
+    def __init__(self, vim):
+        self.vim = vim
+        self.lock = threading.Lock()
+        self.pending = []
+
+    def write(self, utterances: List[Utterance]):
+        with self.lock:
+            scheduled = bool(self.pending)
+            self.pending.extend(u.txt for u in utterances)
+
+        if not scheduled:
+            self.vim.async_call(self.flush)
+
+    def flush(self):
+        with self.lock:
+            texts, self.pending = self.pending, []
+
+        self.vim.api.echo([[" | ".join(texts), "None"]], False, {})
+
+
+class Fanout(Sink):
+    """
+    Writes to the primary sink inline and to the others from a background
+    thread, so that secondary outputs never delay the primary one.
+    """
+
+    def __init__(self, sinks: List[Sink]):
+        self.sinks = sinks
+        self.queue = queue.Queue()
+        self.thread = None
+
+        if len(sinks) > 1:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def write(self, utterances: List[Utterance]):
+        if not self.sinks:
+            return
+
+        self.write_secondary(utterances)
+        self.sinks[0].write(utterances)
+
+    def write_secondary(self, utterances: List[Utterance]):
+        if self.thread is not None:
+            self.queue.put(utterances)
+
+    def run(self):
+        while True:
+            utterances = self.queue.get()
+            if utterances is None:
+                return
+
+            for sink in self.sinks[1:]:
+                try:
+                    sink.write(utterances)
+                except Exception:
+                    logger.exception(f"{type(sink).__name__} failed")
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,58 @@
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional
+
+
+def token_pattern(operators: Iterable[str]):
+    """
+    Words, numbers and the given operators (longest first), then any other
+    single non-space character
+    """
+    ops = sorted({op.strip() for op in operators if op.strip()}, key=len, reverse=True)
+    return re.compile(r"[A-Za-z_]\w*|\d[\w.]*|" + "".join(f"{re.escape(op)}|" for op in ops) + r"\S")
+
+
+class LineTokens(object):
+    """
+    Token offsets of one line, so the token under a column is a bisect away
+    """
+
+    def __init__(self, line: str, pattern):
+        self.line = line
+        self.starts = []
+        self.ends = []
+        for match in pattern.finditer(line):
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+
+    def at(self, col: int) -> Optional[str]:
+        """
+        Given a 0-based character column, return the token covering it, or None on whitespace
+        """
+        i = bisect_right(self.starts, col) - 1
+        if i >= 0 and col < self.ends[i]:
+            return self.line[self.starts[i]:self.ends[i]]
+        return None
+
+
+class TokenCache(object):
+    """
+    LRU of LineTokens keyed by (bufnr, lnum, changedtick)
+    """
+
+    def __init__(self, pattern, capacity: int = 64):
+        self.pattern = pattern
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def get(self, key: Hashable, line: str) -> LineTokens:
+        tokens = self.entries.get(key)
+        if tokens is None:
+            tokens = self.entries[key] = LineTokens(line, self.pattern)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+
+        return tokens
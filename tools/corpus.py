@@ -0,0 +1,182 @@
+"""
+Regression and throughput harness for PrettyReader.
+
+    python3 tools/corpus.py [PATH ...] [--min-nodes-per-second N]
+                            [--max-ms-per-statement N] [--quiet]
+
+Every top-level statement of every Python file under PATH (the standard
+library by default) is explained in isolation. The run reports which node
+types were seen and which fell through to `generic_visit`, every node type
+that raised, and nodes-per-second / time-per-statement figures. It exits
+non-zero if any node type errors or throughput misses its budget.
+"""
+import argparse
+import ast
+import os
+import sys
+import sysconfig
+import time
+import tokenize
+import types
+from collections import Counter
+
+PACKAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rplugin", "python3", "neoreader")
+
+# The package's __init__ loads the plugin and with it pynvim, neither of
+# which PrettyReader needs, so the harness imports its modules from a bare
+# package instead
+_package = types.ModuleType("neoreader")
+_package.__path__ = [PACKAGE]
+sys.modules.setdefault("neoreader", _package)
+
+from neoreader.py_ast import PrettyReader
+
+
+# Budgets sit well under what a laptop manages on the stdlib, so they only
+# trip on real regressions rather than on a noisy machine
+MIN_NODES_PER_SECOND = 200000
+MAX_MS_PER_STATEMENT = 0.6
+
+
+class Stats(object):
+    def __init__(self):
+        self.files = 0
+        self.skipped = 0
+        self.statements = 0
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.slowest = (0.0, None)
+        self.visited = Counter()
+        self.unhandled = Counter()
+        self.failures = Counter()
+        self.examples = {}
+
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def ms_per_statement(self) -> float:
+        return 1000 * self.elapsed / self.statements if self.statements else 0.0
+
+
+class CountingReader(PrettyReader):
+    """
+    PrettyReader that tallies every node it dispatches on. Subtrees a visitor
+    skips are not counted, so nodes per second reflects work actually done
+    """
+
+    def __init__(self, stats: Stats):
+        super().__init__()
+        self.stats = stats
+        self.stack = []
+
+    def visit(self, node):
+        name = type(node).__name__
+        self.stats.nodes += 1
+        self.stats.visited[name] += 1
+        if not hasattr(self, 'visit_' + name):
+            self.stats.unhandled[name] += 1
+
+        # Not popped on exceptions, so the top is the node that raised
+        self.stack.append(name)
+        result = super().visit(node)
+        if not isinstance(result, str):
+            raise TypeError(f"visit_{name} returned {type(result).__name__}")
+
+        self.stack.pop()
+        return result
+
+
+def iter_sources(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            # Third-party packages installed into the stdlib tree aren't ours to budget
+            dirs[:] = sorted(d for d in dirs if d != "site-packages")
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    yield os.path.join(root, name)
+
+
+def run_file(path: str, stats: Stats):
+    try:
+        with tokenize.open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (SyntaxError, UnicodeDecodeError, ValueError, OSError):
+        stats.skipped += 1
+        return
+
+    stats.files += 1
+    reader = CountingReader(stats)
+
+    for statement in tree.body:
+        stats.statements += 1
+
+        start = time.perf_counter()
+        try:
+            reader.visit(statement)
+        except Exception as e:
+            culprit = reader.stack[-1] if reader.stack else type(statement).__name__
+            stats.failures[culprit] += 1
+            stats.examples.setdefault(
+                culprit,
+                f"{path}:{statement.lineno}: {type(e).__name__}: {e}"
+            )
+        finally:
+            reader.stack = []
+        taken = time.perf_counter() - start
+
+        stats.elapsed += taken
+        if taken > stats.slowest[0]:
+            stats.slowest = (taken, f"{path}:{statement.lineno}")
+
+
+def report(stats: Stats, quiet=False):
+    print(f"{stats.files} files ({stats.skipped} skipped), "
+          f"{stats.statements} statements, {stats.nodes} nodes")
+    print(f"{stats.nodes_per_second():.0f} nodes/s, "
+          f"{stats.ms_per_statement():.3f} ms/statement, "
+          f"slowest {1000 * stats.slowest[0]:.1f} ms at {stats.slowest[1]}")
+
+    if not quiet:
+        print()
+        print(f"{'node type':<20} {'visits':>10} {'fallback':>10} {'errors':>8}")
+        for name, count in sorted(stats.visited.items()):
+            print(f"{name:<20} {count:>10} {stats.unhandled[name]:>10} {stats.failures[name]:>8}")
+
+    if stats.failures:
+        print()
+        print("Failures:")
+        for name, count in stats.failures.most_common():
+            print(f"  {name} x{count}: {stats.examples[name]}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[sysconfig.get_paths()["stdlib"]])
+    parser.add_argument("--min-nodes-per-second", type=float, default=MIN_NODES_PER_SECOND)
+    parser.add_argument("--max-ms-per-statement", type=float, default=MAX_MS_PER_STATEMENT)
+    parser.add_argument("--quiet", action="store_true", help="skip the per-node-type table")
+    args = parser.parse_args(argv)
+
+    stats = Stats()
+    for path in iter_sources(args.paths):
+        run_file(path, stats)
+
+    report(stats, quiet=args.quiet)
+
+    failed = bool(stats.failures)
+    if stats.nodes_per_second() < args.min_nodes_per_second:
+        print(f"Throughput below budget of {args.min_nodes_per_second:.0f} nodes/s")
+        failed = True
+    if stats.ms_per_statement() > args.max_ms_per_statement:
+        print(f"Time per statement above budget of {args.max_ms_per_statement} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())